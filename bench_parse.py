@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# Parse time and memory of the map script parser against the old str.replace/split one.
+# The script is rebuilt from map.json, so no network access is needed.
+
+import argparse
+import json
+import timeit
+import tracemalloc
+
+from utils import parse_map, parse_path
+
+
+def legacy_parse_map(text):
+    data = text.replace('jQuery.fn.vectorMap(', '[').replace(');', ']').replace("'", '"')
+    return json.loads(data)[2]['paths']
+
+
+def legacy_extract_points(path):
+    subpaths = [i.lstrip('M') for i in path.rstrip('Z').split('Z')]
+    contours = []
+    for sp in subpaths:
+        coords = [i.split(',') for i in sp.split('l')]
+        x, y = map(float, coords[0])
+        contour = [(x, y)]
+        for c in coords[1:]:
+            x += float(c[0])
+            y += float(c[1])
+            contour.append((x, y))
+        contours.append(contour)
+    return contours
+
+
+def legacy_load(text):
+    return {r: legacy_extract_points(v['path']) for r, v in legacy_parse_map(text).items()}
+
+
+def load(text):
+    return {r: parse_path(v['path']) for r, v in parse_map(text).items()}
+
+
+def build_script(map_file='map.json'):
+    with open(map_file, encoding='utf8') as f:
+        paths = {k: {'path': v['path'], 'name': v['name']} for k, v in json.load(f).items()}
+    data = {'insets': [], 'paths': paths, 'height': 440.7, 'width': 900, 'projection': {'type': 'mill'}}
+    return "jQuery.fn.vectorMap('addMap', 'world_mill_ru', {});".format(json.dumps(data, ensure_ascii=False))
+
+
+def measure_memory(func, text):
+    tracemalloc.start()
+    res = func(text)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del res
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of the map parsers')
+    parser.add_argument('-n', '--number', type=int, default=5, help='runs per measurement')
+    args = parser.parse_args()
+    text = build_script()
+    print('Script size: {:.0f} KiB'.format(len(text.encode()) / 1024))
+    print('{:8} {:>10} {:>14} {:>12}'.format('parser', 'time, ms', 'retained, KiB', 'peak, KiB'))
+    for name, func in (('legacy', legacy_load), ('stream', load)):
+        elapsed = min(timeit.repeat(lambda: func(text), number=1, repeat=args.number))
+        retained, peak = measure_memory(func, text)
+        print('{:8} {:10.1f} {:14.0f} {:12.0f}'.format(name, elapsed * 1000, retained / 1024, peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import hashlib
+import shlex
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+
+DEFAULT_SOLVER = 'https://bladdon.ru/solvecaptcha'
+SOLVER_TIMEOUT = 10
+SOLVER_RETRIES = 3
+RETRY_DELAY = 1
+RECHECK_INTERVAL = 5
+CAPTCHA_ENERGY = 15
+CACHE_SIZE = 1000
+
+
+class SolverError(Exception):
+    pass
+
+
+class HttpSolver:
+
+    def __init__(self, url, timeout=SOLVER_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def solve(self, svg):
+        try:
+            res = requests.post(self.url, data=svg.encode(), timeout=self.timeout)
+            res.raise_for_status()
+        except requests.RequestException as e:
+            raise SolverError(str(e))
+        answer = res.text.strip()
+        if not answer:
+            raise SolverError('empty answer from ' + self.url)
+        return answer
+
+
+class CommandSolver:
+    # Local backend: the SVG goes to stdin, the answer is read from stdout
+
+    def __init__(self, command, timeout=SOLVER_TIMEOUT):
+        self.command = shlex.split(command)
+        self.timeout = timeout
+
+    def solve(self, svg):
+        try:
+            res = subprocess.run(self.command, input=svg, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 universal_newlines=True, timeout=self.timeout, check=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise SolverError(str(e))
+        answer = res.stdout.strip()
+        if not answer:
+            raise SolverError('empty answer from ' + self.command[0])
+        return answer
+
+
+def make_solver(spec, timeout=SOLVER_TIMEOUT):
+    if spec.startswith('http://') or spec.startswith('https://'):
+        return HttpSolver(spec, timeout)
+    return CommandSolver(spec, timeout)
+
+
+def captcha_key(svg):
+    return hashlib.sha1(svg.encode()).hexdigest()
+
+
+class CaptchaManager:
+
+    def __init__(self, submit, get_energy, solvers, threshold=CAPTCHA_ENERGY):
+        self.submit = submit
+        self.get_energy = get_energy
+        self.solvers = solvers
+        self.threshold = threshold
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.svg = None
+        self.answer = None
+        self.last_submitted = None
+        self.counters = {'solved': 0, 'cached': 0, 'failed': 0, 'submitted': 0, 'wrong': 0}
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def on_captcha(self, svg):
+        with self.lock:
+            self.svg = svg
+            self.answer = None
+        self.event.set()
+
+    def on_energy(self):
+        self.event.set()
+
+    def on_wrong(self):
+        with self.lock:
+            self.counters['wrong'] += 1
+            if self.last_submitted is not None:
+                self.cache.pop(self.last_submitted, None)
+                self.last_submitted = None
+
+    def run(self):
+        while True:
+            self.event.wait(RECHECK_INTERVAL)
+            self.event.clear()
+            try:
+                self.process()
+            except Exception as e:
+                print('Captcha failed:', e)
+
+    def process(self):
+        with self.lock:
+            svg, answer = self.svg, self.answer
+        if svg is None:
+            return
+        if answer is None:
+            # solve right away so that the answer is ready before the energy runs out
+            answer = self.solve(svg)
+            if answer is None:
+                return
+            with self.lock:
+                if self.svg is not svg:
+                    return
+                self.answer = answer
+        energy = self.get_energy()
+        if energy is None or energy > self.threshold:
+            return
+        with self.lock:
+            if self.svg is not svg:
+                return
+            self.svg = self.answer = None
+            self.last_submitted = captcha_key(svg)
+            self.counters['submitted'] += 1
+        self.submit(answer)
+
+    def solve(self, svg):
+        key = captcha_key(svg)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counters['cached'] += 1
+                return self.cache[key]
+        delay = RETRY_DELAY
+        for attempt in range(SOLVER_RETRIES):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+            for solver in self.solvers:
+                try:
+                    answer = solver.solve(svg)
+                except SolverError as e:
+                    print('Captcha solver failed:', e)
+                    continue
+                with self.lock:
+                    self.cache[key] = answer
+                    if len(self.cache) > CACHE_SIZE:
+                        self.cache.popitem(last=False)
+                    self.counters['solved'] += 1
+                return answer
+        with self.lock:
+            self.counters['failed'] += 1
+        return None
@@ -0,0 +1,175 @@
+import json
+import queue
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+HOST = '127.0.0.1'
+LOCAL_HOSTS = {'127.0.0.1', 'localhost'}
+
+
+class StreamWriter:
+    # passes everything printed by a command to its client
+
+    def __init__(self):
+        self.output = queue.Queue()
+        self.abandoned = False
+
+    def write(self, text):
+        if text and not self.abandoned:
+            self.output.put(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.output.put(None)
+
+
+class ThreadOutput:
+    # sys.stdout replacement sending the output of a thread to its own stream, so that
+    # background threads (captcha solving, status line) keep printing to the real stdout
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def redirect(self, stream):
+        self.local.stream = stream
+
+    def target(self):
+        return getattr(self.local, 'stream', None) or self.default
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def is_allowed(self):
+        # browsers always send Origin with cross-site POSTs, and a foreign Host means DNS rebinding
+        host = (self.headers.get('Host') or '').rsplit(':', 1)[0]
+        if self.headers.get('Origin') is not None or host not in LOCAL_HOSTS:
+            self.send_error(403)
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.is_allowed():
+            return
+        if self.path == '/state':
+            self.send_json(self.server.control.get_state())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.is_allowed():
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf8').strip()
+        if self.path == '/command':
+            if not body:
+                self.send_error(400, 'Empty command')
+                return
+            self.stream(self.server.control.submit(body))
+        elif self.path == '/stop':
+            self.send_json({'stopped': self.server.control.stop()})
+        else:
+            self.send_error(404)
+
+    def send_json(self, data):
+        data = json.dumps(data, ensure_ascii=False).encode('utf8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def stream(self, writer):
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            while True:
+                chunk = writer.output.get()
+                if chunk is None:
+                    break
+                chunk = chunk.encode('utf8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            self.server.control.abandon(writer)
+
+
+class ControlServer:
+
+    def __init__(self, port, execute, get_state, interrupt):
+        self.execute = execute
+        self.state = get_state
+        self.interrupt = interrupt
+        self.commands = queue.Queue()
+        self.current = None
+        self.current_writer = None
+        self.output = None
+        self.counters = {'commands': 0, 'errors': 0}
+        self.server = ThreadingHTTPServer((HOST, port), ControlHandler)
+        self.server.daemon_threads = True
+        self.server.control = self
+
+    def serve(self):
+        self.output = sys.stdout = ThreadOutput(sys.stdout)
+        threading.Thread(target=self.work, daemon=True).start()
+        print('Listening on http://{}:{}'.format(*self.server.server_address))
+        self.server.serve_forever()
+
+    def submit(self, command):
+        writer = StreamWriter()
+        self.commands.put((command, writer))
+        return writer
+
+    def abandon(self, writer):
+        # the client is gone: drop the output and do not keep running the command for nobody
+        writer.abandoned = True
+        if self.current_writer is writer:
+            self.interrupt()
+
+    def stop(self):
+        command = self.current
+        if command is not None:
+            self.interrupt()
+        return command
+
+    def get_state(self):
+        state = self.state()
+        state['daemon'] = dict(self.counters, queued=self.commands.qsize(), current=self.current)
+        return state
+
+    def work(self):
+        running = True
+        while running:
+            command, writer = self.commands.get()
+            if writer.abandoned:
+                continue
+            self.current, self.current_writer = command, writer
+            self.output.redirect(writer)
+            try:
+                running = self.execute(command.split())
+            except Exception as e:
+                self.counters['errors'] += 1
+                print('Error:', e)
+            finally:
+                self.output.redirect(None)
+            self.current = self.current_writer = None
+            self.counters['commands'] += 1
+            writer.close()
+        self.server.shutdown()
@@ -1,40 +1,25 @@
 #!/usr/bin/env python3
 
 
+import argparse
 import json
-import requests
-
-from utils import parse_map
+import math
+from collections import defaultdict
 
+import requests
 
-def extract_points(path):
-    subpaths = [i.lstrip('M') for i in path.rstrip('Z').split('Z')]
-    contours = []
-    for sp in subpaths:
-        coords = [i.split(',') for i in sp.split('l')]
-        x, y = map(float, coords[0])
-        contour = [(x, y)]
-        for c in coords[1:]:
-            x += float(c[0])
-            y += float(c[1])
-            contour.append((x, y))
-        contours.append(contour)
-    return contours
+from utils import parse_map, parse_path, contour_points
 
 
-def find_box(points):
-    return [min(i[0] for i in points), min(i[1] for i in points),
-            max(i[0] for i in points), max(i[1] for i in points)]
+def find_box(contours):
+    return [min(min(c[0::2]) for c in contours), min(min(c[1::2]) for c in contours),
+            max(max(c[0::2]) for c in contours), max(max(c[1::2]) for c in contours)]
 
 
 def find_centroid(box):
     return [(box[0] + box[2]) / 2, (box[1] + box[3]) / 2]
 
 
-def flatten(contours):
-    return {i for contour in contours for i in contour}
-
-
 BOX_EPS = 1
 
 def boxes_intersect(box1, box2):
@@ -72,6 +57,7 @@ def segment_dist(x1, y1, x2, y2, x3, y3, x4, y4):
 
 
 def path_dist(path1, path2):
+    path1, path2 = contour_points(path1), contour_points(path2)
     return min(segment_dist(*a[0], *a[1], *b[0], *b[1]) for a in zip(path1, path1[1:] + path1[:1])
                for b in zip(path2, path2[1:] + path2[:1]))
 
@@ -84,11 +70,61 @@ def are_neighbors(a, b):
     return border_dist(a, b) < BORDER_DIST_EPS
 
 
-def main():
-    map_data = parse_map(requests.get('https://worldroulette.ru/world_mill_ru.js').text)
-    borders = {r: extract_points(v['path']) for r, v in map_data.items()}
+GRID_CELL = 4
+
+
+def contour_segments(contours):
+    for contour in contours:
+        points = contour_points(contour)
+        yield from zip(points, points[1:] + points[:1])
+
+
+def grid_cells(a, b, margin=0):
+    x1, x2 = sorted((a[0], b[0]))
+    y1, y2 = sorted((a[1], b[1]))
+    for i in range(math.floor((x1 - margin) / GRID_CELL), math.floor((x2 + margin) / GRID_CELL) + 1):
+        for j in range(math.floor((y1 - margin) / GRID_CELL), math.floor((y2 + margin) / GRID_CELL) + 1):
+            yield i, j
+
 
-    boxes = {r: find_box(flatten(v)) for r, v in borders.items()}
+def segment_grid(contours):
+    grid = defaultdict(list)
+    for a, b in contour_segments(contours):
+        for cell in grid_cells(a, b):
+            grid[cell].append((a, b))
+    return grid
+
+
+def border_length(contours, grid):
+    # total length of the segments lying within BORDER_DIST_EPS of any segment in the grid
+    length = 0
+    for a, b in contour_segments(contours):
+        if any(segment_dist(*a, *b, *c, *d) < BORDER_DIST_EPS
+               for cell in grid_cells(a, b, BORDER_DIST_EPS) for c, d in grid.get(cell, ())):
+            length += math.hypot(b[0] - a[0], b[1] - a[1])
+    return length
+
+
+def shared_border_length(contours1, grid1, contours2, grid2):
+    return (border_length(contours1, grid2) + border_length(contours2, grid1)) / 2
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Neighbor and border length generator')
+    parser.add_argument('-m', '--map', help='read the country paths from map.json instead of downloading the map')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.map:
+        with open(args.map, encoding='utf8') as f:
+            map_data = json.load(f)
+    else:
+        map_data = parse_map(requests.get('https://worldroulette.ru/world_mill_ru.js').text)
+    borders = {r: parse_path(v['path']) for r, v in map_data.items()}
+
+    boxes = {r: find_box(v) for r, v in borders.items()}
     centroids = {r: find_centroid(v) for r, v in boxes.items()}
     print('Centroids generated')
     box_neighbors = find_box_neighbors(boxes)
@@ -103,5 +139,12 @@ def main():
     with open('neighbors.json', 'w') as f:
         json.dump(neighbors, f, sort_keys=True)
 
+    grids = {r: segment_grid(v) for r, v in borders.items()}
+    lengths = {c: {n: round(shared_border_length(borders[c], grids[c], borders[n], grids[n]), 2) for n in ns}
+               for c, ns in neighbors.items()}
+    print('Border lengths generated')
+    with open('borders.json', 'w') as f:
+        json.dump(lengths, f, sort_keys=True)
+
 if __name__ == '__main__':
     main()
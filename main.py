@@ -19,12 +19,16 @@ import math
 import re
 import os
 import threading
+from array import array
+from bisect import bisect_left, insort
 from collections import defaultdict, namedtuple
 
 import socketio
 from Crypto.Cipher import AES
 import struct
-import requests
+
+from captcha import CaptchaManager, DEFAULT_SOLVER, make_solver
+from daemon import ControlServer
 
 
 ROLL_INTERVAL = 1.1
@@ -33,6 +37,13 @@ HOST = 'https://worldroulette.ru/'
 MAX_LEVEL = 3
 
 
+def positive_int(value):
+    value = int(value)
+    if value <= 0:
+        raise argparse.ArgumentTypeError('must be positive')
+    return value
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description='Bot for worldroulette.ru')
     parser.add_argument('sessions', nargs='*', help='session cookies from your browser')
@@ -40,6 +51,12 @@ def parse_args():
     parser.add_argument('-g', '--guest', action='store_true', help='do not log in')
     parser.add_argument('-p', '--password', help='login:password')
     parser.add_argument('-s', '--server', default='0')
+    parser.add_argument('-t', '--top', type=positive_int, default=20, help='number of users shown before the prompt')
+    parser.add_argument('--status', action='store_true', help='show live status in the terminal title')
+    parser.add_argument('-d', '--daemon', metavar='PORT', type=int,
+                        help='run without a prompt, taking commands over HTTP on localhost:PORT')
+    parser.add_argument('--solver', action='append',
+                        help='captcha solver URL or local command, may be repeated (default: {})'.format(DEFAULT_SOLVER))
     return parser.parse_args()
 
 ARGS = parse_args()
@@ -53,6 +70,40 @@ with open('map.json', encoding='utf8') as f:
     COUNTRIES = {k: Country(v['name'], float(v['area'])) for k, v in json.load(f).items()}
 
 
+MIN_BORDER = 0.1
+
+
+class BorderGraph:
+    # neighbors weighted by shared border length, stored as compressed sparse rows
+
+    def __init__(self, neighbors, lengths):
+        self.codes = sorted(set(neighbors).union(*neighbors.values()))
+        self.index = {c: i for i, c in enumerate(self.codes)}
+        self.indptr = array('i', [0])
+        self.indices = array('i')
+        self.weights = array('d')
+        for c in self.codes:
+            for n in sorted(neighbors.get(c, ())):
+                self.indices.append(self.index[n])
+                # point contacts still count as neighbors
+                self.weights.append(max(lengths.get(c, {}).get(n, 0), MIN_BORDER))
+            self.indptr.append(len(self.indices))
+        self.mean_weight = sum(self.weights) / max(len(self.weights), 1)
+
+    def neighbors(self, country):
+        i = self.index.get(country)
+        if i is None:
+            return ()
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return zip([self.codes[j] for j in self.indices[start:end]], self.weights[start:end])
+
+    def border(self, country, predicate):
+        return sum(w for n, w in self.neighbors(country) if predicate(n))
+
+with open('borders.json', encoding='utf8') as f:
+    BORDERS = BorderGraph(NEIGHBORS, json.load(f))
+
+
 class CredentialsManager:
 
     def __init__(self):
@@ -78,18 +129,39 @@ class Store:
         self.base_items = {}
         self.online = set()
         self.captcha = None
+        self.listeners = defaultdict(list)
+
+    def subscribe(self, event, callback):
+        self.listeners[event].append(callback)
+
+    def notify(self, event, *args):
+        for callback in self.listeners[event]:
+            callback(*args)
 
     def reset(self):
         self.countries = {}
         self.online = set()
+        self.notify('reset')
 
     def update_users(self, users):
+        energy = self.get_energy()
+        clans_changed = False
         for u in users:
+            old = self.users.get(u['id'])
+            if old is None or old.get('clan') != u.get('clan'):
+                clans_changed = True
             self.users[u['id']] = u
+        if self.get_energy() != energy:
+            self.notify('energy')
+        if clans_changed:
+            self.notify('clans')
 
     def update_countries(self, countries):
         for c in countries:
-            self.countries[c['code']] = CountryOwner(c['owner'], c['power'])
+            old = self.countries.get(c['code'])
+            new = self.countries[c['code']] = CountryOwner(c['owner'], c['power'])
+            if old != new:
+                self.notify('country', c['code'], old, new)
 
     def update_clans(self, clans):
         for c in clans:
@@ -97,15 +169,19 @@ class Store:
 
     def update_online(self, online):
         self.online = {int(u['user']) for u in online}
+        self.notify('online')
 
     def add_online(self, online):
         self.online.add(int(online['user']))
+        self.notify('online')
 
     def remove_online(self, online):
         self.online.discard(int(online))
+        self.notify('online')
 
     def update_captcha(self, captcha):
         self.captcha = captcha
+        self.notify('captcha', captcha)
 
     def update_items(self, base_items, items):
         for bi in base_items:
@@ -166,18 +242,126 @@ class Store:
             return '{} [{}]'.format(name, clan)
 
     def get_energy(self):
-        return self.users[self.me]['energy']
+        user = self.users.get(self.me)
+        return None if user is None else user['energy']
 
 store = Store()
 
 
+MAX_STRENGTH = 3
+PRIOR_ROLLS = 20
+PRIOR_STRENGTH = 0.11
+PRIOR_SUCCESS = 0.1
+
+
+class RollStats:
+
+    def __init__(self):
+        self.pending = None
+        self.outcomes = defaultdict(lambda: [0] * (MAX_STRENGTH + 1))
+        self.strengths = {}
+
+    def start(self, mine, power):
+        self.pending = (mine, power)
+
+    def record(self, strength):
+        if self.pending is None:
+            return
+        self.outcomes[self.pending][strength] += 1
+        self.strengths.pop(self.pending, None)
+        self.pending = None
+
+    def success_probability(self, mine, power):
+        outcomes = self.outcomes.get((mine, power), [0])
+        return (sum(outcomes[1:]) + PRIOR_SUCCESS * PRIOR_ROLLS) / (sum(outcomes) + PRIOR_ROLLS)
+
+    def expected_strength(self, mine, power):
+        # expected power change per roll, smoothed towards the prior for rarely seen levels
+        key = (mine, power)
+        strength = self.strengths.get(key)
+        if strength is None:
+            outcomes = self.outcomes.get(key, [0])
+            strength = ((sum(s * n for s, n in enumerate(outcomes)) + PRIOR_STRENGTH * PRIOR_ROLLS) /
+                        (sum(outcomes) + PRIOR_ROLLS))
+            self.strengths[key] = strength
+        return strength
+
+roll_stats = RollStats()
+
+
+AREA_WEIGHT = 1
+FRONTIER_BONUS = 0.5
+ONLINE_PENALTY = 0.5
+MEAN_AREA = sum(c.area for c in COUNTRIES.values()) / len(COUNTRIES)
+
+
+class TargetScorer:
+
+    def __init__(self):
+        self.values = {}
+        self.online = {}
+        # values are computed and invalidated under the lock, so that an invalidation coming from
+        # the socket thread in the middle of a computation can not leave a stale value in the cache
+        self.lock = threading.Lock()
+        store.subscribe('country', self.invalidate_country)
+        store.subscribe('online', self.invalidate_online)
+        store.subscribe('clans', self.invalidate_online)
+        store.subscribe('reset', self.reset)
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+            self.online.clear()
+
+    def invalidate_country(self, country, old, new):
+        with self.lock:
+            self.values.pop(country, None)
+            for n in NEIGHBORS.get(country, ()):
+                self.values.pop(n, None)
+
+    def invalidate_online(self):
+        with self.lock:
+            self.online.clear()
+
+    def value(self, country):
+        with self.lock:
+            value = self.values.get(country)
+            if value is None:
+                mine = store.is_mine(country, False)
+                frontier = BORDERS.border(country, lambda n: (n in store.countries and store.is_mine(n, False)) != mine)
+                frontier /= BORDERS.mean_weight
+                value = (1 + AREA_WEIGHT * COUNTRIES[country].area / MEAN_AREA) * (1 + FRONTIER_BONUS * frontier)
+                self.values[country] = value
+            return value
+
+    def is_online(self, user):
+        with self.lock:
+            online = self.online.get(user)
+            if online is None:
+                online = self.online[user] = store.is_online(user)
+            return online
+
+    def score(self, country):
+        power = store.get_power(country)
+        if store.is_mine(country, False):
+            if power >= MAX_LEVEL:
+                return 0
+            return self.value(country) * roll_stats.expected_strength(True, power) / MAX_LEVEL
+        score = self.value(country) * roll_stats.expected_strength(store.is_mine(country), power) / max(power, 1)
+        if self.is_online(store.get_owner_id(country)):
+            score *= ONLINE_PENALTY
+        return score
+
+scorer = TargetScorer()
+
+
 def sorted_countries(order):
     mine = [c for c in store.countries if store.is_mine(c, False)]
     not_mine = [c for c in store.countries if not store.is_mine(c, False)]
     if order == 'near' or order == 'conn':
         random.shuffle(not_mine)
         mine_set = set(mine)
-        dists = sorted(((-sum(n in mine for n in NEIGHBORS[c]), c) for c in not_mine), key=lambda x: x[0])
+        dists = sorted(((-BORDERS.border(c, mine_set.__contains__), c) for c in not_mine), key=lambda x: x[0])
         if order == 'conn':
             dists = [i for i in dists if i[0] < 0]
         return sorted(mine, key=store.get_power), [i[1] for i in dists]
@@ -189,18 +373,128 @@ def sorted_countries(order):
         return sorted(mine, key=lambda x: COUNTRIES[x].area), sorted(not_mine, key=lambda x: COUNTRIES[x].area)
     elif order == 'large':
         return sorted(mine, key=lambda x: -COUNTRIES[x].area), sorted(not_mine, key=lambda x: -COUNTRIES[x].area)
+    elif order == 'ev':
+        return sorted(mine, key=scorer.score, reverse=True), sorted(not_mine, key=scorer.score, reverse=True)
     return mine, not_mine
 
 
-def get_player_list():
-    countries = defaultdict(int)
-    points = defaultdict(int)
-    for value in store.countries.values():
-        countries[value.user] += 1
-        points[value.user] += value.power
-    users = [{'id': i, 'name': store.get_user_representation(i), 'countries': countries[i], 'points': points[i]}
-                for i in store.users if points[i]]
-    return sorted(users, key=lambda x: (-x['points'], -x['countries'], int(x['id'])))
+class Leaderboard:
+
+    def __init__(self, top):
+        self.top = top
+        self.lock = threading.Lock()
+        self.reset()
+        store.subscribe('country', self.update_country)
+        store.subscribe('reset', self.reset)
+
+    def reset(self):
+        with self.lock:
+            self.countries = defaultdict(int)
+            self.points = defaultdict(int)
+            self.ranking = []
+            self.shown = {}
+
+    def key(self, user):
+        return (-self.points[user], -self.countries[user], int(user), user)
+
+    def move(self, user, countries, points):
+        if self.points[user]:
+            del self.ranking[bisect_left(self.ranking, self.key(user))]
+        self.countries[user] += countries
+        self.points[user] += points
+        if self.points[user]:
+            insort(self.ranking, self.key(user))
+
+    def update_country(self, country, old, new):
+        with self.lock:
+            if old is not None:
+                self.move(old.user, -1, -old.power)
+            self.move(new.user, 1, new.power)
+
+    def rank(self, user):
+        with self.lock:
+            if not self.points[user]:
+                return None
+            return bisect_left(self.ranking, self.key(user)) + 1
+
+    def get_player_list(self, limit=None):
+        with self.lock:
+            ranking = []
+            for key in self.ranking:
+                if limit is not None and len(ranking) >= limit:
+                    break
+                if key[3] in store.users:
+                    ranking.append(key[3])
+            return [{'id': i, 'name': store.get_user_representation(i), 'countries': self.countries[i],
+                     'points': self.points[i], 'rank': rank}
+                    for rank, i in enumerate(ranking, 1)]
+
+    def total(self):
+        with self.lock:
+            return len(self.ranking)
+
+    def redraw(self, force=False):
+        players = self.get_player_list(self.top)
+        # the name carries the online markers, so online changes redraw the table too
+        shown = {i['id']: (i['rank'], i['points'], i['name']) for i in players}
+        if shown == self.shown and not force:
+            return
+        lines = []
+        for i in players:
+            change = ''
+            if i['id'] not in self.shown:
+                change = ' new'
+            else:
+                rank, points, _ = self.shown[i['id']]
+                if points != i['points']:
+                    change += ' {:+}'.format(i['points'] - points)
+                if rank != i['rank']:
+                    change += ' ^{}'.format(rank - i['rank']) if rank > i['rank'] else ' v{}'.format(i['rank'] - rank)
+            lines.append('[{id:4}] {name} ({countries}, {points}){}'.format(change, **i))
+        gone = [i for i in self.shown if i not in shown and i in store.users]
+        if gone:
+            lines.append('Left the top: ' + ', '.join(store.get_user_representation(i) for i in gone))
+        hidden = self.total() - len(players)
+        if hidden > 0:
+            lines.append('... and {} more'.format(hidden))
+        self.shown = shown
+        print('Users on the map:\n' + '\n'.join(lines))
+        print()
+
+
+STATUS_INTERVAL = 0.5
+
+
+class StatusLine:
+
+    def __init__(self, leaderboard, interval=STATUS_INTERVAL):
+        self.leaderboard = leaderboard
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.timer = None
+        self.last_draw = 0
+        for event in ('country', 'energy', 'online', 'reset'):
+            store.subscribe(event, self.changed)
+
+    def changed(self, *args):
+        # events come in bursts, so redraw at most once per interval, after the burst settles
+        with self.lock:
+            if self.timer is not None:
+                return
+            self.timer = threading.Timer(max(0, self.last_draw + self.interval - time.time()), self.draw)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def draw(self):
+        with self.lock:
+            self.timer = None
+            self.last_draw = time.time()
+        me = store.me
+        text = 'energy {} | {} countries, {} points | rank {} | {} online'.format(
+            store.get_energy(), self.leaderboard.countries[me], self.leaderboard.points[me],
+            self.leaderboard.rank(me) or '-', len(store.online))
+        sys.stdout.write('\x1b]0;{}\x07'.format(text))
+        sys.stdout.flush()
 
 
 def putchar(c):
@@ -279,20 +573,18 @@ class SessionManager:
         match = ROLL_RESULT_RE.match(msg)
         if match:
             num = match.group(1)
-            if num[3] != num[2]:
-                putchar('.')
-            elif num[2] != num[1]:
-                putchar('*')
-            elif num[1] != num[0]:
-                putchar('#')
-            else:
-                putchar('@')
+            strength = 0
+            while strength < MAX_STRENGTH and num[3 - strength] == num[2 - strength]:
+                strength += 1
+            roll_stats.record(strength)
+            putchar('.*#@'[strength])
 
     def get_captcha(self, data=None):
         if data:
             store.update_captcha(data['svg'])
 
     def wrong_captcha(self):
+        store.notify('wrong_captcha')
         with self.lock:
             self.close()
             self.connect()
@@ -316,13 +608,16 @@ class Roller:
     def __init__(self, session):
         self.session = session
         self.last_roll = 0
+        self.rolls = 0
 
     def roll(self, target):
         now = time.time()
         if now < self.last_roll + ROLL_INTERVAL:
             time.sleep(self.last_roll + ROLL_INTERVAL - now)
         self.last_roll = time.time()
+        roll_stats.start(store.is_mine(target), store.get_power(target))
         self.session.emit('roll', target)
+        self.rolls += 1
         time.sleep(0.3)
 
 
@@ -420,8 +715,14 @@ class Bot:
         self.mode = 'a'
         self.tokens = -1
         self.roller = Roller(self.session)
-        self.watcher = threading.Thread(target=self.captcha_watcher, daemon=True)
-        self.watcher.start()
+        self.interrupted = threading.Event()
+        self.captcha = CaptchaManager(self.submit_captcha, store.get_energy,
+                                      [make_solver(s) for s in ARGS.solver or [DEFAULT_SOLVER]])
+        store.subscribe('captcha', self.captcha.on_captcha)
+        store.subscribe('energy', self.captcha.on_energy)
+        store.subscribe('wrong_captcha', self.captcha.on_wrong)
+        if store.captcha:
+            self.captcha.on_captcha(store.captcha)
 
     def conquer_country(self, country, limit):
         if store.is_mine(country) or (limit < 0 and store.get_power(country) <= -limit):
@@ -431,6 +732,7 @@ class Bot:
                                                                      store.get_user_representation(store.get_owner_id(country))))
         rolls = 0
         while not store.is_mine(country) and (limit > 0 or store.get_power(country) > -limit):
+            self.check_interrupt()
             self.roller.roll(country)
             rolls += 1
             if rolls > 50:
@@ -447,6 +749,7 @@ class Bot:
             '' if store.is_mine(country, False) else ', belongs to ' + store.get_user_representation(store.get_owner_id(country))))
         rolls = 0
         while store.is_mine(country) and store.get_power(country) < limit:
+            self.check_interrupt()
             self.roller.roll(country)
             rolls += 1
             if rolls > 50:
@@ -485,18 +788,17 @@ class Bot:
             if not changed:
                 return
 
-    def captcha_watcher(self):
-        while True:
-            try:
-                if store.get_energy() <= 15 and store.captcha:
-                    captcha = store.captcha
-                    res = requests.post('https://bladdon.ru/solvecaptcha', data=captcha).text
-                    self.session.emit('checkCaptcha', res)
-                    store.captcha = None
-                time.sleep(0.5)
-            except Exception:
-                print('Captcha failed')
-                time.sleep(3)
+    def interrupt(self):
+        self.interrupted.set()
+
+    def check_interrupt(self):
+        if self.interrupted.is_set():
+            self.interrupted.clear()
+            raise KeyboardInterrupt
+
+    def submit_captcha(self, answer):
+        self.session.emit('checkCaptcha', answer)
+        store.captcha = None
 
     def sell_all(self):
         for id, name in list(store.items.items()):
@@ -563,126 +865,196 @@ def compare_lists(lhs, rhs):
 
 
 
-ORDERS = ['near', 'conn', 'random', 'large', 'small']
+ORDERS = ['near', 'conn', 'random', 'large', 'small', 'ev']
 MODES = ['d', 'a']
 
 
+class Console:
+
+    def __init__(self, bot, leaderboard):
+        self.bot = bot
+        self.leaderboard = leaderboard
+        self.order = ORDERS[0]
+        self.mode = MODES[0]
+        self.max_level = MAX_LEVEL
+
+    def prompt(self):
+        return '{} ({} {}{})> '.format(self.bot.session.namespace, self.order, self.mode, self.max_level)
+
+    def execute(self, c):
+        bot = self.bot
+        bot.interrupted.clear()
+        try:
+            if c[0] == 'exit':
+                return False
+            if c[0].startswith('/'):
+                num = c[0][1:]
+                if num in ['0', '1', '2', '3', '']:
+                    store.reset()
+                    bot.session.change_namespace(num or bot.session.namespace[1:])
+                    print()
+                    return True
+                print('Wrong server')
+                return True
+            if c[0].startswith('!'):
+                val = c[0][1:]
+                if val == '!':
+                    self.order = ORDERS[0]
+                    self.mode = MODES[0]
+                    self.max_level = MAX_LEVEL
+                elif val in ORDERS:
+                    self.order = val
+                elif val in MODES:
+                    self.mode = val
+                elif val in {str(i) for i in range(-MAX_LEVEL + 1, MAX_LEVEL + 1) if i}:
+                    self.max_level = int(val)
+                else:
+                    print('Available orders:', ', '.join(ORDERS))
+                    print('Available modes:', ', '.join(MODES))
+                    print()
+                return True
+            if c[0] == 'sellall':
+                bot.sell_all()
+                print()
+                return True
+            if c[0] == 'mine':
+                while True:
+                    bot.check_interrupt()
+                    bot.open_case()
+                    bot.sell_all()
+                    time.sleep(0.5)
+            if c[0] == 'list':
+                print_country_list(bot.list_countries(list(map(str.upper, c[1:])), self.order, self.mode))
+                print()
+                return True
+            if c[0] == 'stats':
+                for (mine, power), outcomes in sorted(roll_stats.outcomes.items()):
+                    print('{} level {}: {} rolls, success {:.3f}'.format('own' if mine else 'foreign', power, sum(outcomes),
+                                                                      roll_stats.success_probability(mine, power)))
+                print()
+                return True
+            if c[0] == 'top':
+                if len(c) > 1:
+                    try:
+                        top = int(c[1])
+                    except ValueError:
+                        top = 0
+                    if top <= 0:
+                        print('Bad number of users')
+                        print()
+                        return True
+                    self.leaderboard.top = top
+                self.leaderboard.redraw(force=True)
+                return True
+            if c[0] == 'clans':
+                for c, name in sorted(store.clans.items()):
+                    print(str(c).ljust(4), name)
+                print()
+                return True
+            if c[0] == 'alias':
+                if len(c) < 2:
+                    list_aliases()
+                    print()
+                    return True
+                if not is_alias_name(c[1]):
+                    print('Invalid alias name')
+                    print()
+                    return True
+                countries = sorted(bot.list_countries(list(map(str.upper, c[2:]))))
+                save_countries(countries, c[1].upper())
+                print('Saved')
+                print()
+                return True
+            if c[0] == 'tokens':
+                if len(c) == 1:
+                    print(bot.tokens)
+                    print()
+                    return True
+                try:
+                    tokens = int(c[1])
+                except ValueError:
+                    print('Bad number of tokens')
+                    print()
+                    return True
+                bot.tokens = tokens
+                print()
+                return True
+            loop = False
+            if c[0] == 'loop':
+                loop = True
+                c = c[1:]
+            if c == ['*']:
+                c = []
+            c = list(map(str.upper, c))
+            if c.count('<>') == 1:
+                lhs = bot.list_countries(c[:c.index('<>')])
+                rhs = bot.list_countries(c[c.index('<>') + 1:])
+                compare_lists(lhs, rhs)
+                return True
+            while True:
+                bot.conquer(c, self.order, self.mode, self.max_level)
+                if not loop:
+                    break
+                bot.check_interrupt()
+                time.sleep(1)
+            print()
+        except MatchingError as e:
+            print(e.args[0])
+            print()
+        except KeyboardInterrupt:
+            print('Interrupting')
+        return True
+
+    def get_state(self):
+        me = store.me
+        return {
+            'server': self.bot.session.namespace,
+            'me': me,
+            'order': self.order,
+            'mode': self.mode,
+            'max_level': self.max_level,
+            'tokens': self.bot.tokens,
+            'energy': store.get_energy(),
+            'countries': self.leaderboard.countries[me],
+            'points': self.leaderboard.points[me],
+            'rank': self.leaderboard.rank(me),
+            'online': len(store.online),
+            'items': len(store.items),
+            'captcha_pending': store.captcha is not None,
+            'counters': {
+                'rolls': self.bot.roller.rolls,
+                'captcha': dict(self.bot.captcha.counters),
+                'roll_outcomes': {'{}{}'.format('own' if mine else 'foreign', power): list(outcomes)
+                                  for (mine, power), outcomes in sorted(roll_stats.outcomes.items())},
+            },
+            'users': self.leaderboard.get_player_list(self.leaderboard.top),
+        }
+
+
 def main():
     if ARGS.sessions:
         credentials.update_session(ARGS.sessions[0])
+    leaderboard = Leaderboard(ARGS.top)
+    if ARGS.status:
+        StatusLine(leaderboard)
     bot = Bot(SessionManager(ARGS.password or None, namespace=ARGS.server))
-    order = ORDERS[0]
-    mode = MODES[0]
-    max_level = MAX_LEVEL
+    console = Console(bot, leaderboard)
     try:
+        if ARGS.daemon:
+            ControlServer(ARGS.daemon, console.execute, console.get_state, bot.interrupt).serve()
+            return
         while True:
-            print('Users on the map:\n' + '\n'.join('[{id:4}] {name} ({countries}, {points})'.format(**i)
-                                                    for i in get_player_list()))
-            print()
+            leaderboard.redraw()
             try:
-                c = input('{} ({} {}{})> '.format(bot.session.namespace, order, mode, max_level)).split()
+                c = input(console.prompt()).split()
             except EOFError:
                 print()
                 return
             if not c:
                 continue
             try:
-                if c[0] == 'exit':
+                if not console.execute(c):
                     break
-                if c[0].startswith('/'):
-                    num = c[0][1:]
-                    if num in ['0', '1', '2', '3', '']:
-                        store.reset()
-                        bot.session.change_namespace(num or bot.session.namespace[1:])
-                        print()
-                        continue
-                    print('Wrong server')
-                    continue
-                if c[0].startswith('!'):
-                    val = c[0][1:]
-                    if val == '!':
-                        order = ORDERS[0]
-                        mode = MODES[0]
-                        max_level = MAX_LEVEL
-                    elif val in ORDERS:
-                        order = val
-                    elif val in MODES:
-                        mode = val
-                    elif val in {str(i) for i in range(-MAX_LEVEL + 1, MAX_LEVEL + 1) if i}:
-                        max_level = int(val)
-                    else:
-                        print('Available orders:', ', '.join(ORDERS))
-                        print('Available modes:', ', '.join(MODES))
-                        print()
-                    continue
-                if c[0] == 'sellall':
-                    bot.sell_all()
-                    print()
-                    continue
-                if c[0] == 'mine':
-                    while True:
-                        bot.open_case()
-                        bot.sell_all()
-                        time.sleep(0.5)
-                if c[0] == 'list':
-                    print_country_list(bot.list_countries(list(map(str.upper, c[1:])), order, mode))
-                    print()
-                    continue
-                if c[0] == 'clans':
-                    for c, name in sorted(store.clans.items()):
-                        print(str(c).ljust(4), name)
-                    print()
-                    continue
-                if c[0] == 'alias':
-                    if len(c) < 2:
-                        list_aliases()
-                        print()
-                        continue
-                    if not is_alias_name(c[1]):
-                        print('Invalid alias name')
-                        print()
-                        continue
-                    countries = sorted(bot.list_countries(list(map(str.upper, c[2:]))))
-                    save_countries(countries, c[1].upper())
-                    print('Saved')
-                    print()
-                    continue
-                if c[0] == 'tokens':
-                    if len(c) == 1:
-                        print(bot.tokens)
-                        print()
-                        continue
-                    try:
-                        tokens = int(c[1])
-                    except ValueError:
-                        print('Bad number of tokens')
-                        print()
-                        continue
-                    bot.tokens = tokens
-                    print()
-                    continue
-                loop = False
-                if c[0] == 'loop':
-                    loop = True
-                    c = c[1:]
-                if c == ['*']:
-                    c = []
-                c = list(map(str.upper, c))
-                if c.count('<>') == 1:
-                    lhs = bot.list_countries(c[:c.index('<>')])
-                    rhs = bot.list_countries(c[c.index('<>') + 1:])
-                    compare_lists(lhs, rhs)
-                    continue
-                while True:
-                    bot.conquer(c, order, mode, max_level)
-                    if not loop:
-                        break
-                    time.sleep(1)
-                print()
-            except MatchingError as e:
-                print(e.args[0])
-                print()
-                continue
             except KeyboardInterrupt:
                 print('Interrupting')
                 continue
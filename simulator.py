@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+# Offline Monte Carlo comparison of the bot's orders and modes.
+#
+# Model: every roll ends with 0-3 extra repeated digits (a plain roll, a double, a triple or a quad),
+# which is the strength of the roll. Rolling your own country raises its power by the strength,
+# up to MAX_LEVEL; rolling someone else's lowers it by the strength, and the country is captured
+# at power 1 once its power drops to zero. Synthetic opponents roll random countries of the map.
+# All games of a strategy are played at once, one roll per step, on (games x countries) arrays.
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+
+MAX_LEVEL = 3
+ORDERS = ['near', 'conn', 'random', 'large', 'small']
+MODES = ['d', 'a']
+ROLL_STRENGTH_PROBS = [0.9, 0.09, 0.009, 0.001]
+STRENGTH_THRESHOLDS = np.cumsum(ROLL_STRENGTH_PROBS)[:-1]
+TIRED_ROLLS = 50
+MIN_BORDER = 0.1
+BOT = 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Strategy simulator for the worldroulette.ru bot')
+    parser.add_argument('-g', '--games', type=int, default=1000, help='games per strategy')
+    parser.add_argument('-r', '--rolls', type=int, default=300, help='bot rolls per game')
+    parser.add_argument('-o', '--opponents', type=int, default=8)
+    parser.add_argument('-a', '--activity', type=float, default=0.5, help='probability that an opponent rolls on a step')
+    parser.add_argument('-l', '--level', type=int, default=MAX_LEVEL, choices=range(1, MAX_LEVEL + 1),
+                        help='power level the bot stops at')
+    parser.add_argument('--orders', nargs='+', default=ORDERS, choices=ORDERS)
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--seed', type=int)
+    return parser.parse_args()
+
+
+class WorldMap:
+
+    def __init__(self, map_file='map.json', neighbors_file='neighbors.json', borders_file='borders.json'):
+        with open(map_file, encoding='utf8') as f:
+            countries = json.load(f)
+        with open(neighbors_file, encoding='utf8') as f:
+            neighbors = json.load(f)
+        with open(borders_file, encoding='utf8') as f:
+            lengths = json.load(f)
+        self.codes = sorted(countries)
+        index = {c: i for i, c in enumerate(self.codes)}
+        self.area = np.array([float(countries[c]['area']) for c in self.codes])
+        # weighted by shared border length, like the near and conn orders of the bot
+        self.adjacency = np.zeros((len(self.codes), len(self.codes)), dtype=np.float32)
+        for c, ns in neighbors.items():
+            for n in ns:
+                if c in index and n in index:
+                    weight = max(lengths.get(c, {}).get(n, 0), lengths.get(n, {}).get(c, 0), MIN_BORDER)
+                    self.adjacency[index[c], index[n]] = self.adjacency[index[n], index[c]] = weight
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class Simulation:
+
+    def __init__(self, world, games, opponents, activity, level, rng):
+        self.world = world
+        self.games = games
+        self.opponents = opponents
+        self.activity = activity
+        self.level = level
+        self.rng = rng
+        self.rows = np.arange(games)
+        size = len(world)
+        self.owner = rng.integers(1, opponents + 1, size=(games, size)).astype(np.int16)
+        self.power = rng.integers(1, MAX_LEVEL + 1, size=(games, size)).astype(np.int8)
+        start = rng.integers(0, size, size=games)
+        self.owner[self.rows, start] = BOT
+        self.power[self.rows, start] = 1
+        self.target = np.full(games, -1)
+        self.tired = np.zeros(games, dtype=np.int32)
+
+    def strengths(self, n):
+        return np.searchsorted(STRENGTH_THRESHOLDS, self.rng.random(n), side='right').astype(np.int8)
+
+    def roll(self, rows, targets, roller):
+        strength = self.strengths(len(rows))
+        own = self.owner[rows, targets] == roller
+        power = self.power[rows, targets]
+        power = np.where(own, np.minimum(power + strength, MAX_LEVEL), power - strength)
+        captured = power <= 0
+        self.owner[rows[captured], targets[captured]] = roller
+        self.power[rows, targets] = np.where(captured, 1, power)
+
+    def needs_roll(self, rows, targets):
+        mine = self.owner[rows, targets] == BOT
+        return ~mine | (self.power[rows, targets] < self.level)
+
+    def choose_targets(self, rows, order, mode):
+        mine = self.owner[rows] == BOT
+        power = self.power[rows]
+        jitter = self.rng.random(mine.shape)
+        if order in ('near', 'conn'):
+            closeness = mine.astype(np.float32) @ self.world.adjacency
+            foreign_key = -closeness + jitter * 1e-3
+            mine_key = power + jitter * 0.5
+        elif order == 'random':
+            foreign_key = power + jitter * 0.5
+            mine_key = foreign_key
+        elif order == 'small':
+            foreign_key = mine_key = np.broadcast_to(self.world.area, mine.shape)
+        else:
+            foreign_key = mine_key = np.broadcast_to(-self.world.area, mine.shape)
+        key = np.where(mine, mine_key, foreign_key)
+        # attack mode lists foreign countries first, defence mode lists own countries first
+        key = key + np.where(mine == (mode == 'a'), 1e9, 0)
+        eligible = np.where(mine, power < self.level, True)
+        if order == 'conn':
+            eligible &= mine | (closeness > 0)
+        key = np.where(eligible, key, np.inf)
+        targets = key.argmin(axis=1)
+        return np.where(np.isfinite(key[np.arange(len(rows)), targets]), targets, -1)
+
+    def step(self, order, mode):
+        has_target = self.target >= 0
+        stale = ~has_target | (self.tired >= TIRED_ROLLS)
+        stale[has_target] |= ~self.needs_roll(self.rows[has_target], self.target[has_target])
+        stale = self.rows[stale]
+        if len(stale):
+            self.target[stale] = self.choose_targets(stale, order, mode)
+            self.tired[stale] = 0
+        active = self.rows[self.target >= 0]
+        self.roll(active, self.target[active], BOT)
+        self.tired[active] += 1
+        for opponent in range(1, self.opponents + 1):
+            rows = self.rows[self.rng.random(self.games) < self.activity]
+            self.roll(rows, self.rng.integers(0, len(self.world), size=len(rows)), opponent)
+        return len(active)
+
+    def territory(self):
+        return np.where(self.owner == BOT, self.world.area, 0).sum(axis=1)
+
+    def points(self):
+        return np.where(self.owner == BOT, self.power, 0).sum(axis=1)
+
+
+def simulate(world, order, mode, args, rng):
+    sim = Simulation(world, args.games, args.opponents, args.activity, args.level, rng)
+    territory, points = sim.territory(), sim.points()
+    rolls = sum(sim.step(order, mode) for _ in range(args.rolls))
+    rolls = max(rolls / args.games, 1)
+    return {
+        'territory': (sim.territory() - territory).mean() / rolls,
+        'points': (sim.points() - points).mean() / rolls,
+        'countries': (sim.owner == BOT).sum(axis=1).mean(),
+        'rolls': rolls,
+    }
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    world = WorldMap()
+    print('{:8} {:4} {:>12} {:>12} {:>10} {:>8} {:>10}'.format('order', 'mode', 'area/roll', 'points/roll',
+                                                             'countries', 'rolls', 'games/s'))
+    for order in args.orders:
+        for mode in args.modes:
+            start = time.perf_counter()
+            res = simulate(world, order, mode, args, rng)
+            speed = args.games / (time.perf_counter() - start)
+            print('{:8} {:4} {territory:12.4f} {points:12.4f} {countries:10.1f} {rolls:8.0f} {:10.0f}'.format(
+                order, mode, speed, **res))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import pytest
+
+from utils import parse_map, parse_path
+
+
+def contours(path):
+    return [list(c) for c in parse_path(path)]
+
+
+def test_relative_lines():
+    assert contours('M1,2l1,1l2,-1Z') == [[1, 2, 2, 3, 4, 2]]
+
+
+def test_every_moveto_starts_a_contour():
+    assert contours('M1,2M3,4') == [[1, 2], [3, 4]]
+    assert contours('M1,2l1,0m1,1l0,1') == [[1, 2, 2, 2], [3, 3, 3, 4]]
+
+
+def test_implicit_lineto_after_moveto():
+    assert contours('M0,0 1,1 2,0') == [[0, 0, 1, 1, 2, 0]]
+    assert contours('m1,1 1,1') == [[1, 1, 2, 2]]
+
+
+def test_horizontal_and_vertical():
+    assert contours('M10 10 h5 v5 H10 z') == [[10, 10, 15, 10, 15, 15, 10, 15]]
+    assert contours('M0,0V3h-1') == [[0, 0, 0, 3, -1, 3]]
+
+
+def test_close_returns_to_subpath_start():
+    assert contours('M1,1l1,0Zl0,1') == [[1, 1, 2, 1], [1, 1, 1, 2]]
+    assert contours('M1,1l1,0zm1,1') == [[1, 1, 2, 1], [2, 2]]
+
+
+def test_compact_numbers():
+    assert contours('M0,0l1e-1,2') == [[0, 0, 0.1, 2]]
+    assert contours('M0,0L1E+1-2.5e0') == [[0, 0, 10, -2.5]]
+    assert contours('M0,0l1.5.5-1-1') == [[0, 0, 1.5, 0.5, 0.5, -0.5]]
+
+
+@pytest.mark.parametrize('path', ['M0,0C1,1 2,2 3,3', 'M0,0l1', 'M0,0Z1', '1,2'])
+def test_bad_paths(path):
+    with pytest.raises(ValueError):
+        parse_path(path)
+
+
+def test_map_script_keeps_apostrophes():
+    script = ("jQuery.fn.vectorMap('addMap', 'world_mill_ru', {insets: [], 'paths': "
+              "{'CI': {'path': 'M1,1l1,1Z', 'name': 'Кот-д\\'Ивуар'}, \"XX\": {\"path\": \"M1,1Z\", \"name\": \"it's\"}}, "
+              "height: 440.7, ok: true});")
+    assert parse_map(script) == {'CI': {'path': 'M1,1l1,1Z', 'name': "Кот-д'Ивуар"},
+                                 'XX': {'path': 'M1,1Z', 'name': "it's"}}
@@ -1,6 +1,171 @@
 import json
+import re
+from array import array
+from itertools import accumulate, chain, groupby
+from operator import itemgetter
+
+
+SCRIPT_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<punct>[{}\[\](),:;])
+      | "(?P<dstring>[^"\\]*(?:\\.[^"\\]*)*)"
+      | '(?P<sstring>[^'\\]*(?:\\.[^'\\]*)*)'
+      | (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<word>[A-Za-z_$][\w$.]*)
+    )''', re.VERBOSE)
+SSTRING_ESCAPE_RE = re.compile(r'''\\(.)|"''', re.DOTALL)
+LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+def unquote_single(text):
+    # turn the body of a JS '...' string into a JSON "..." string
+    return SSTRING_ESCAPE_RE.sub(lambda m: '\\"' if m.group(0) == '"' else
+                                 (m.group(1) if m.group(1) == "'" else m.group(0)), text)
+
+
+def tokenize_script(text):
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        match = SCRIPT_TOKEN_RE.match(text, pos)
+        if match is None:
+            raise ValueError('Unexpected character at {}: {!r}'.format(pos, text[pos:pos + 20]))
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'dstring' or kind == 'sstring':
+            value = match.group(kind)
+            if '\\' in value:
+                value = json.loads('"' + (value if kind == 'dstring' else unquote_single(value)) + '"')
+            yield 'value', value
+        elif kind == 'number':
+            yield 'value', float(match.group(kind))
+        elif kind == 'word' and match.group(kind) in LITERALS:
+            yield 'value', LITERALS[match.group(kind)]
+        else:
+            yield kind, match.group(kind)
+
+
+def parse_value(tokens, token):
+    kind, value = token
+    if kind == 'value':
+        return value
+    if value == '{':
+        res = {}
+        for kind, key in tokens:
+            if key == '}':
+                return res
+            if key == ',':
+                continue
+            if kind not in ('value', 'word'):
+                raise ValueError('Bad object key: {!r}'.format(key))
+            if next(tokens)[1] != ':':
+                raise ValueError('Expected ":" after {!r}'.format(key))
+            res[key] = parse_value(tokens, next(tokens))
+        raise ValueError('Unterminated object')
+    if value == '[':
+        res = []
+        for token in tokens:
+            if token[1] == ']':
+                return res
+            if token[1] != ',':
+                res.append(parse_value(tokens, token))
+        raise ValueError('Unterminated array')
+    raise ValueError('Unexpected token: {!r}'.format(value))
+
+
+def parse_call(text, name='jQuery.fn.vectorMap'):
+    tokens = tokenize_script(text)
+    for kind, value in tokens:
+        if kind == 'word' and value == name and next(tokens)[1] == '(':
+            break
+    else:
+        raise ValueError(name + ' call not found')
+    args = []
+    for token in tokens:
+        if token[1] == ')':
+            return args
+        if token[1] != ',':
+            args.append(parse_value(tokens, token))
+    raise ValueError('Unterminated call')
 
 
 def parse_map(text):
-    data = text.replace('jQuery.fn.vectorMap(', '[').replace(');', ']').replace("'", '"')
-    return json.loads(data)[2]['paths']
+    return parse_call(text)[2]['paths']
+
+
+NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+PATH_COMMAND_RE = re.compile(r'([MmLlHhVvZz])([^A-DF-Za-df-z]*)')
+SUBPATH_RE = re.compile(r'(?=[Mm])')
+
+
+def command_runs(path):
+    # consecutive segments with the same command are parsed as one run, e.g. l1,2l3,4 as l1,2 3,4;
+    # every moveto starts a new subpath, so the path is split on movetos first and they are never joined
+    for subpath in SUBPATH_RE.split(path):
+        segments = PATH_COMMAND_RE.findall(subpath)
+        if len(''.join(chain.from_iterable(segments))) != len(subpath):
+            raise ValueError('Bad path: {!r}'.format(subpath[:40]))
+        for command, run in groupby(segments, key=itemgetter(0)):
+            yield command, ' '.join(args for _, args in run)
+
+
+def parse_path(path):
+    # Returns the contours of an SVG path as flat array('d') buffers of x, y pairs
+    contours = []
+    contour = None
+    x = y = start_x = start_y = 0.0
+    for command, args in command_runs(path.strip()):
+        values = list(map(float, NUMBER_RE.findall(args)))
+        if command in 'Zz':
+            if values:
+                raise ValueError('Coordinates after ' + command)
+            x, y = start_x, start_y
+            contour = None
+            continue
+        if not values:
+            raise ValueError('No coordinates after ' + command)
+        if command in 'Mm':
+            if len(values) % 2:
+                raise ValueError('Odd number of coordinates after ' + command)
+            if command == 'm':
+                x += values[0]
+                y += values[1]
+            else:
+                x, y = values[0], values[1]
+            start_x, start_y = x, y
+            contour = array('d', (x, y))
+            contours.append(contour)
+            # further pairs after a moveto are implicit linetos
+            values = values[2:]
+            command = 'l' if command == 'm' else 'L'
+            if not values:
+                continue
+        elif contour is None:
+            contour = array('d', (x, y))
+            contours.append(contour)
+        if command in 'HhVv':
+            if command == 'H':
+                xs, ys = values, [y] * len(values)
+            elif command == 'h':
+                xs, ys = list(accumulate([x] + values))[1:], [y] * len(values)
+            elif command == 'V':
+                xs, ys = [x] * len(values), values
+            else:
+                xs, ys = [x] * len(values), list(accumulate([y] + values))[1:]
+        else:
+            if len(values) % 2:
+                raise ValueError('Odd number of coordinates after ' + command)
+            xs, ys = values[0::2], values[1::2]
+            if command == 'l':
+                xs = list(accumulate([x] + xs))[1:]
+                ys = list(accumulate([y] + ys))[1:]
+        points = [0.0] * (2 * len(xs))
+        points[0::2] = xs
+        points[1::2] = ys
+        contour.extend(points)
+        x, y = xs[-1], ys[-1]
+    return contours
+
+
+def contour_points(contour):
+    return list(zip(contour[0::2], contour[1::2]))